@@ -1,136 +1,294 @@
 import asyncio
 import argparse
 import sys
-from call_computer_use import compile_trends
+from call_computer_use import compile_trends, close_compiler, warm_up_compiler
 import os
 from dotenv import load_dotenv
 from trends.app_client import TrendsAppClient
+from trends.client_factory import get_token_provider
 from trends.config import TrendsConfig
-import json
+from trends.history import HistoryManager
+import orjson
 import traceback
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 load_dotenv()
 
-# Load configuration
-config = TrendsConfig.from_env()
-config.validate()
+# Session state is persisted here between runs
+SESSION_FILE = Path(".trends_session.json")
+SESSION_MAX_AGE_SECONDS = 24 * 60 * 60
+
+# Reports compiled in this session, kept in full even after the history
+# compacts them away; the model fetches them again through get_report
+generated_reports: List[str] = []
+
+
+def get_report(index: int = -1) -> str:
+    """Return a previously generated report, the most recent by default."""
+    try:
+        return generated_reports[index]
+    except IndexError:
+        return (
+            f"No report at index {index}; "
+            f"{len(generated_reports)} reports have been generated in this session"
+        )
+
 
-# Create the AI client
-ai_client = TrendsAppClient(config)
 available_functions = {
     "compile_trends": compile_trends,
+    "get_report": get_report,
 }
 
-# Get current date in ddmmyy format
-current_date = datetime.now().strftime("%d%m%y")
-
-instructions = f"""
+# Static system instructions. Keep this free of anything that changes across
+# a session so the prompt prefix stays cache-hot; per-turn values such as the
+# current date are passed separately via build_context_message().
+INSTRUCTIONS = """
 Step1: You will help the user to explore various trends in fashion by using the computer use agent. The user will provide a query, and you will compile the trends based on that query, in a Markdown document format.
-Step2: You will then prompt the user to store the trends report in an Azure Blob Storage location, so that it can be referred to or shared with others. You will use the MCP Server provided as a tool, to perform this action. provide a suitable name for the blob and suffix it with the current date in ddmmyy format. For example: {current_date}
+Step2: You will then prompt the user to store the trends report in an Azure Blob Storage location, so that it can be referred to or shared with others. You will use the MCP Server provided as a tool, to perform this action. provide a suitable name for the blob and suffix it with the current date in ddmmyy format, as given in the context message.
     - when the user asks for the list of containers, and when you display the response, show the values as comma separated container name values for readability.
 Note that step2 can be performed only after step1 is completed successfully.
 
-IMPORTANT: Maintain context of previously generated reports in this conversation. If a user asks to store a report, use the report that was previously generated in this conversation session. If no report has been generated yet, ask the user to provide a query first.
+IMPORTANT: Maintain context of previously generated reports in this conversation. If a user asks to store a report, use the report that was previously generated in this conversation session. Reports from older turns are omitted from the conversation; call get_report to retrieve the full text before storing one. If no report has been generated yet, ask the user to provide a query first.
 """
 
 
-async def main() -> str:
+def build_context_message() -> dict:
+    """Build the small per-turn context message that follows the cached instructions."""
+    # Get current date in ddmmyy format
+    current_date = datetime.now().strftime("%d%m%y")
+    return {
+        "role": "system",
+        "content": [
+            {"type": "input_text", "text": f"Today's date (ddmmyy): {current_date}"},
+        ],
+    }
+
+
+@lru_cache(maxsize=1)
+def get_client() -> TrendsAppClient:
+    """Load configuration and create the AI client on first use."""
+    config = TrendsConfig.from_env()
+    config.validate()
+    return TrendsAppClient(config)
+
+
+async def execute_function_call(output) -> Any:
+    """Execute a function call emitted by the model and return its result."""
+    function_to_call = available_functions[output.name]
+    function_args = output.arguments
+    if not isinstance(function_args, dict):
+        function_args = orjson.loads(function_args)
+
+    if asyncio.iscoroutinefunction(function_to_call):
+        return await function_to_call(**function_args)
+    return function_to_call(**function_args)
+
+
+# Stream events that stream_app_response acts on; all others stay on the reader thread
+FINAL_RESPONSE_EVENTS = ("response.completed", "response.incomplete", "response.failed")
+
+
+async def stream_app_response(
+    input_messages: List[Dict[str, Any]],
+) -> Tuple[Any, Dict[str, asyncio.Task]]:
+    """
+    Stream a response and start function calls as soon as they are complete.
+
+    A single worker thread sends the request and reads the whole stream,
+    forwarding only completed function calls and the final response to the
+    event loop, so the started function calls can make progress while the
+    model is still generating the rest of the response.
+
+    Returns:
+        The completed response and the function call tasks keyed by call_id
+    """
+    ai_client = get_client()
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def read_stream() -> None:
+        stream = ai_client.create_app_response(
+            instructions=INSTRUCTIONS,
+            conversation_history=input_messages,
+            mcp_server_url=ai_client.config.mcp_server_url,
+            available_functions=available_functions,
+            stream=True,
+        )
+        with stream:
+            for event in stream:
+                if event.type in FINAL_RESPONSE_EVENTS or (
+                    event.type == "response.output_item.done"
+                    and event.item.type == "function_call"
+                ):
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+
+    reader = asyncio.create_task(asyncio.to_thread(read_stream))
+    # Runs on the loop after every forwarded event, marking the end of the stream
+    reader.add_done_callback(lambda _: events.put_nowait(None))
+
+    response = None
+    function_tasks = {}
+    while (event := await events.get()) is not None:
+        if event.type == "response.output_item.done":
+            print(f"Function call: {event.item.name}")
+            function_tasks[event.item.call_id] = asyncio.create_task(
+                execute_function_call(event.item)
+            )
+        else:
+            response = event.response
+
+    if function_tasks:
+        await asyncio.gather(*function_tasks.values(), return_exceptions=True)
+
+    # Surface errors raised while sending the request or reading the stream
+    await reader
+
+    if response is None:
+        raise RuntimeError("Response stream ended without a final response")
+
+    return response, function_tasks
+
+
+async def warm_up_token() -> None:
+    """Acquire (and cache) the Azure AD token ahead of the next request."""
+    try:
+        await asyncio.to_thread(get_token_provider())
+    except Exception as e:
+        print(f"Token warm-up failed: {e}")
+
+
+async def run_turn(
+    user_query: str,
+    conversation_history: List[Dict[str, Any]],
+    generated_reports: List[str],
+) -> List[Dict[str, Any]]:
+    """
+    Send one user query to the agent and process its outputs.
+
+    Returns:
+        The updated conversation history
+    """
+    # Add the new user input to conversation history
+    new_user_message = {
+        "role": "user",
+        "content": [
+            {"type": "input_text", "text": user_query},
+        ],
+    }
+    conversation_history.append(new_user_message)
+    # Context message goes after the cached instructions and before history
+    input_messages = [build_context_message()] + conversation_history
+
+    print(f"Query: {user_query}")
+    print(f"Conversation history length: {len(conversation_history)}")
+    print(f"Generated reports count: {len(generated_reports)}")
+
+    # Stream the Responses API call so function calls start early
+    response, function_tasks = await stream_app_response(input_messages)
+
+    print(f"Response status: {response.status}")
+
+    # Process all outputs in the response
+    for output in response.output:
+        if output.type == "function_call":
+            function_name = output.name
+            function_response = await function_tasks[output.call_id]
+
+            print(f"Function {function_name} completed")
+
+            # Add the call and its result to conversation history as structured items
+            conversation_history.append(
+                {
+                    "type": "function_call",
+                    "call_id": output.call_id,
+                    "name": function_name,
+                    "arguments": output.arguments,
+                }
+            )
+            conversation_history.append(
+                {
+                    "type": "function_call_output",
+                    "call_id": output.call_id,
+                    "output": function_response or "",
+                }
+            )
+
+            # Store the report if it was generated
+            if function_name == "compile_trends" and function_response:
+                generated_reports.append(function_response)
+                print("Report generated and stored in context")
+
+        elif output.type == "mcp_list_tools":
+            # Cache the tool listing so it is not fetched again on later turns
+            print("MCP tools listed")
+            get_client().remember_mcp_tools(output)
+
+        else:
+            # Regular text response or other output types
+            print(f"=== Tool call output ===")
+            print(f"Assistant response: {output}")
+            output_text = HistoryManager.extract_output_text(output)
+            if output_text:
+                conversation_history.append(
+                    {
+                        "role": "assistant",
+                        "content": [{"type": "output_text", "text": output_text}],
+                    }
+                )
+
+    # Drop function outputs from older turns, then summarize the oldest turns
+    # once the history grows past the configured limit
+    conversation_history = HistoryManager.compact(conversation_history)
+    ai_client = get_client()
+    return await asyncio.to_thread(
+        HistoryManager.summarize_oldest,
+        conversation_history,
+        ai_client.summarize_text,
+        ai_client.config.history_token_limit,
+    )
+
+
+async def main(mode: str = "interactive", query: Optional[str] = None) -> None:
     """Main entry point for the application."""
-    # Initialize conversation history to maintain context across iterations
-    conversation_history = []
-    generated_reports = []  # Store reports separately to avoid API format issues
+    if mode == "oneshot":
+        # Compile a report directly, without the agent or MCP storage
+        await compile_trends(query or input("Enter your query for fashion trends:->  "))
+        return
 
+    # Initialize conversation history to maintain context across iterations,
+    # resuming a recent session if one was saved. Reports are stored
+    # separately to avoid API format issues.
+    conversation_history, saved_reports = HistoryManager.load_session(
+        SESSION_FILE, SESSION_MAX_AGE_SECONDS
+    )
+    generated_reports.extend(saved_reports)
+    if conversation_history or generated_reports:
+        print(
+            f"Resumed session with {len(conversation_history)} messages "
+            f"and {len(generated_reports)} reports"
+        )
+
+    pending_query = query
     while True:
         # user_query = "get me the latest trends in men's sports wear"
-        user_query = input("Enter your query for fashion trends:->  ")
-
-        # Add the new user input to conversation history
-        new_user_message = {
-            "role": "user",
-            "content": [
-                {"type": "input_text", "text": user_query},
-            ],
-        }
-        conversation_history.append(new_user_message)
-        # Use the full conversation history as input messages
-        input_messages = conversation_history.copy()
+        if pending_query:
+            # --query is the first (in agent mode, the only) query of the session
+            user_query, pending_query = pending_query, None
+        else:
+            user_query = await asyncio.to_thread(
+                input, "Enter your query for fashion trends:->  "
+            )
 
         try:
-            print(f"Query: {user_query}")
-            print(f"Conversation history length: {len(conversation_history)}")
-            print(f"Generated reports count: {len(generated_reports)}")
-
-            # Call the Responses API with the current state using the modular client
-            response = ai_client.create_app_response(
-                instructions=instructions,
-                conversation_history=conversation_history,
-                mcp_server_url=config.mcp_server_url,
-                available_functions=available_functions,
+            conversation_history = await run_turn(
+                user_query, conversation_history, generated_reports
+            )
+            HistoryManager.save_session(
+                SESSION_FILE, conversation_history, generated_reports
             )
-
-            print(f"Response status: {response.status}")
-
-            # Process all outputs in the response
-            for output in response.output:
-                if output.type == "function_call":
-                    print(f"Function call: {output.name}")
-                    function_name = output.name
-                    function_to_call = available_functions[function_name]
-                    function_args = json.loads(output.arguments)
-
-                    # Execute the function
-                    if asyncio.iscoroutinefunction(function_to_call):
-                        function_response = await function_to_call(**function_args)
-                    else:
-                        function_response = function_to_call(**function_args)
-
-                    print(f"Function {function_name} completed")
-
-                    # Add function call result as text to conversation history
-                    conversation_history.append(
-                        {
-                            "role": "assistant",
-                            "content": [
-                                {
-                                    "type": "output_text",
-                                    "text": f"I executed the function '{function_name}' and generated the fashion trends report.",
-                                }
-                            ],
-                        }
-                    )
-
-                    # Store the report if it was generated
-                    if function_name == "compile_trends" and function_response:
-                        generated_reports.append(function_response)
-                        print("Report generated and stored in context")
-
-                elif output.type == "mcp_list_tools":
-                    # MCP tools are being listed
-                    print("MCP tools listed")
-                    conversation_history.append(
-                        {
-                            "role": "assistant",
-                            "content": [
-                                {
-                                    "type": "output_text",
-                                    "text": "MCP tools have been loaded and are available for use.",
-                                }
-                            ],
-                        }
-                    )
-
-                else:
-                    # Regular text response or other output types
-                    print(f"=== Tool call output ===")
-                    print(f"Assistant response: {output}")
-                    conversation_history.append(
-                        {
-                            "role": "assistant",
-                            "content": [{"type": "output_text", "text": str(output)}],
-                        }
-                    )
-
         except KeyboardInterrupt:
             print("\nSession interrupted by user")
         except Exception as e:
@@ -138,6 +296,50 @@ async def main() -> str:
             traceback.print_exc()
             sys.exit(1)
 
+        if mode == "agent":
+            # A single agent turn was requested
+            break
+
+
+async def run(mode: str, query: Optional[str]) -> None:
+    """Run the application and close the shared browser on exit."""
+    warm_up_tasks = []
+    if mode != "oneshot":
+        # Warm up the browser and token while the user types the first query
+        warm_up_tasks = [
+            asyncio.create_task(warm_up_compiler()),
+            asyncio.create_task(warm_up_token()),
+        ]
+
+    try:
+        await main(mode, query)
+    finally:
+        # Let a browser launch in progress finish so close_compiler() can close
+        # it; cancelling it mid-launch could leave a Chromium process behind
+        await asyncio.gather(*warm_up_tasks, return_exceptions=True)
+        await close_compiler()
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Fashion Trends Compiler Agent")
+    parser.add_argument(
+        "--mode",
+        choices=["interactive", "agent", "oneshot"],
+        default="interactive",
+        help=(
+            "interactive: chat with the agent until interrupted; "
+            "agent: run a single agent turn; "
+            "oneshot: compile a report directly without the agent"
+        ),
+    )
+    parser.add_argument(
+        "--query",
+        help="Query to run; in interactive mode it is the first query of the session",
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    asyncio.run(run(args.mode, args.query))
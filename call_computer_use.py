@@ -3,6 +3,7 @@ Simplified trends compilation entry point.
 This module provides a clean interface for trends compilation using modular components.
 """
 import asyncio
+from functools import lru_cache
 from trends.config import TrendsConfig
 from trends.compiler import TrendsCompiler
 
@@ -15,6 +16,25 @@ def acknowledge_safety_check_callback(message: str) -> bool:
     return response.strip() == "y"
 
 
+@lru_cache(maxsize=1)
+def get_compiler() -> TrendsCompiler:
+    """Load and validate configuration once, and return a shared compiler."""
+    config = TrendsConfig.from_env()
+    config.validate()
+    return TrendsCompiler(config)
+
+
+async def warm_up_compiler() -> None:
+    """Launch the shared browser in the background before it is needed."""
+    await get_compiler().warm_up()
+
+
+async def close_compiler() -> None:
+    """Close the browser shared by compile_trends calls, if one was launched."""
+    if get_compiler.cache_info().currsize:
+        await get_compiler().close()
+
+
 async def compile_trends(user_query: str) -> str:
     """
     Main entry point for trends compilation.
@@ -25,11 +45,8 @@ async def compile_trends(user_query: str) -> str:
     Returns:
         Compiled markdown report of the trends analysis
     """
-    # Load and validate configuration
-    config = TrendsConfig.from_env()
-    config.validate()
-      # Create compiler and run analysis
-    compiler = TrendsCompiler(config)
+    # Reuse the compiler (and its AI client) across invocations
+    compiler = get_compiler()
     print(f"=== Performing Trend Search using Computer Use Agent ===")
     markdown_report = await compiler.compile_trends(user_query)
     
@@ -49,4 +66,10 @@ async def compile_trends(user_query: str) -> str:
 if __name__ == "__main__":
     # Example usage
     query = "get me the latest trends in men's sports wear"
-    asyncio.run(compile_trends(query))
+    async def run_example():
+        try:
+            await compile_trends(query)
+        finally:
+            await close_compiler()
+
+    asyncio.run(run_example())
@@ -1,6 +1,15 @@
 # filepath: c:\Users\sansri\ResponsesAPI Samples\codespace-cua-integration\common\local_playwright.py
-from playwright.async_api import async_playwright, Browser, Page
 import asyncio
+import base64
+import hashlib
+
+# Screenshots are captured as JPEG, which is far cheaper to encode than PNG
+SCREENSHOT_FORMAT = "jpeg"
+SCREENSHOT_QUALITY = 70
+SCREENSHOT_MIME_TYPE = f"image/{SCREENSHOT_FORMAT}"
+
+# Returned by screenshot(skip_unchanged=True) when the page looks the same
+UNCHANGED_SCREENSHOT = "<<unchanged>>"
 
 
 class LocalPlaywrightComputer:
@@ -10,11 +19,17 @@ class LocalPlaywrightComputer:
         self._playwright = None
         self._browser = None
         self._page = None
+        self._cdp_session = None
+        self._cdp_page = None
+        self._last_screenshot_hash = None
         self.headless = headless  # Default is non-headless for interactive use
         self.environment = "browser"
         self.dimensions = (1280, 800)  # Larger default viewport for VS Code
 
     async def __aenter__(self):
+        # Playwright is imported on first launch to keep application startup fast
+        from playwright.async_api import async_playwright
+
         # Start Playwright and get browser/page
         self._playwright = await async_playwright().start()
         await self._get_browser_and_page()
@@ -22,10 +37,17 @@ class LocalPlaywrightComputer:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self._browser:
-            await self._browser.close()
+            try:
+                await self._browser.close()
+            except Exception as e:
+                print(f"Browser close failed: {e}")
         if self._playwright:
             await self._playwright.stop()
 
+    def is_ready(self):
+        """Check if the browser is still running and has an active page."""
+        return bool(self._browser and self._browser.is_connected() and self._page)
+
     async def _get_browser_and_page(self):
         width, height = self.dimensions
         launch_args = [
@@ -116,17 +138,112 @@ class LocalPlaywrightComputer:
                 print("Warning: All pages have been closed.")
                 self._page = None
 
-    async def screenshot(self):
-        """Capture screenshot of the current page."""
-        if self._page:
+    async def screenshot(self, skip_unchanged=False):
+        """
+        Capture a screenshot of the current page as a base64-encoded JPEG.
+
+        With skip_unchanged=True, UNCHANGED_SCREENSHOT is returned instead of
+        the image when it is identical to the previous screenshot.
+        """
+        screenshot_base64 = await self._capture_screenshot()
+        if screenshot_base64 is None:
+            return None
+
+        screenshot_hash = hashlib.blake2b(
+            screenshot_base64.encode("ascii"), digest_size=8
+        ).digest()
+        unchanged = screenshot_hash == self._last_screenshot_hash
+        self._last_screenshot_hash = screenshot_hash
+        if skip_unchanged and unchanged:
+            return UNCHANGED_SCREENSHOT
+        return screenshot_base64
+
+    def reset_screenshot_hash(self):
+        """Forget the last screenshot so the next one is never reported as unchanged."""
+        self._last_screenshot_hash = None
+
+    async def _capture_screenshot(self):
+        """Capture the current page via CDP, falling back to Playwright's API."""
+        if not self._page:
+            print("Cannot take screenshot, no active page")
+            return None
+
+        cdp_session = await self._get_cdp_session()
+        if cdp_session:
             try:
-                return await self._page.screenshot(full_page=False)
+                result = await cdp_session.send(
+                    "Page.captureScreenshot",
+                    {
+                        "format": SCREENSHOT_FORMAT,
+                        "quality": SCREENSHOT_QUALITY,
+                        "optimizeForSpeed": True,
+                    },
+                )
+                return result["data"]
             except Exception as e:
-                print(f"Screenshot failed: {e}")
-                return None
-        else:
-            print("Cannot take screenshot, no active page")
+                # The session may be detached; retry CDP with a fresh session
+                # next time and use Playwright's API for this screenshot
+                print(f"CDP screenshot failed, falling back to Playwright: {e}")
+                self._cdp_session = None
+                self._cdp_page = None
+
+        try:
+            screenshot_bytes = await self._page.screenshot(
+                full_page=False, type=SCREENSHOT_FORMAT, quality=SCREENSHOT_QUALITY
+            )
+            return base64.b64encode(screenshot_bytes).decode("utf-8")
+        except Exception as e:
+            print(f"Screenshot failed: {e}")
+            return None
+
+    async def _get_cdp_session(self):
+        """Return a CDP session for the current page, or None if unsupported."""
+        if self._cdp_page is self._page:
+            return self._cdp_session
+
+        self._cdp_page = self._page
+        try:
+            # CDP is only available on Chromium; other browsers use Playwright's API
+            self._cdp_session = await self._page.context.new_cdp_session(self._page)
+        except Exception:
+            self._cdp_session = None
+        return self._cdp_session
+
+    async def resolve_link_at(self, x, y):
+        """Return the URL of the link under the given coordinates, if any."""
+        return await self.evaluate(
+            f"""() => {{
+            const element = document.elementFromPoint({x}, {y});
+            const link = element && element.closest('a[href]');
+            return link ? link.href : null;
+        }}"""
+        )
+
+    async def screenshot_url(self, url, settle_ms=3000):
+        """Open a URL in a separate browser context and capture a base64 screenshot."""
+        if not self._browser:
+            print("Cannot open URL, no active browser")
+            return None
+
+        width, height = self.dimensions
+        # A new context is cheap compared to launching another browser
+        context = await self._browser.new_context(
+            viewport={"width": width, "height": height},
+            ignore_https_errors=True,
+        )
+        try:
+            page = await context.new_page()
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            await page.wait_for_timeout(settle_ms)
+            screenshot_bytes = await page.screenshot(
+                full_page=False, type=SCREENSHOT_FORMAT, quality=SCREENSHOT_QUALITY
+            )
+            return base64.b64encode(screenshot_bytes).decode("utf-8")
+        except Exception as e:
+            print(f"Screenshot of URL '{url}' failed: {e}")
             return None
+        finally:
+            await context.close()
 
     async def click(self, x, y, button="left"):
         """Click at the specified coordinates."""
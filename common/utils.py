@@ -36,6 +36,17 @@ def calculate_image_dimensions(base_64_image):
     return image.size
 
 
+def downscale_image(base_64_image, max_size, quality=70):
+    """Shrink a base64 image to fit within max_size and re-encode it as JPEG."""
+    image = Image.open(BytesIO(base64.b64decode(base_64_image)))
+    if image.width <= max_size[0] and image.height <= max_size[1]:
+        return base_64_image
+    image.thumbnail(max_size, Image.LANCZOS)
+    buffer = BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
 def sanitize_message(msg: dict) -> dict:
     """Return a copy of the message with image_url omitted for computer_call_output messages."""
     if msg.get("type") == "computer_call_output":
@@ -1,11 +1,15 @@
 """Azure OpenAI client wrapper for trends analysis."""
 
+import asyncio
 import base64
-from typing import List, Dict, Any, Optional
-from openai import AzureOpenAI
+import threading
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 
 from .config import TrendsConfig
-from .client_factory import AzureOpenAIClientFactory
+from .client_factory import AzureOpenAIClientFactory, get_llm_semaphore
+
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
 
 
 class TrendsAIClient:
@@ -16,10 +20,31 @@ class TrendsAIClient:
         self._client = self._create_client()
         self._tools = self._create_tools()
 
-    def _create_client(self) -> AzureOpenAI:
+    def _create_client(self) -> "AzureOpenAI":
         """Create Azure OpenAI client with proper authentication."""
         return AzureOpenAIClientFactory.create_client(self.config)
 
+    def _create_response(self, **kwargs) -> Any:
+        """
+        Call the Responses API, bounded by the process-wide concurrency limit.
+
+        This blocks while waiting for a permit, so call it from a worker thread
+        when on the event loop. For streamed requests the permit is held until
+        the returned stream is exhausted or closed.
+        """
+        semaphore = get_llm_semaphore(self.config.max_concurrent_llm)
+        semaphore.acquire()
+        try:
+            response = self._client.responses.create(**kwargs)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        if kwargs.get("stream"):
+            return _PermitHoldingStream(response, semaphore)
+        semaphore.release()
+        return response
+
     def _create_tools(self) -> List[Dict[str, Any]]:
         """Create tools configuration for computer use."""
         return [
@@ -34,7 +59,8 @@ class TrendsAIClient:
     async def get_response(self, messages: List[Dict[str, Any]]) -> Any:
         """Get response from Azure OpenAI with computer use capabilities."""
         try:
-            response = self._client.responses.create(
+            response = await asyncio.to_thread(
+                self._create_response,
                 model=self.config.model_name,
                 input=messages,
                 tools=self._tools,
@@ -48,12 +74,37 @@ class TrendsAIClient:
     async def get_gpt4o_response(self, messages: List[Dict[str, Any]]) -> Any:
         """Get response from Azure OpenAI GPT-4o model for image analysis."""
         try:
-            response = self._client.responses.create(model="gpt-4o", input=messages)
+            # Run the blocking call on a worker thread so concurrent page
+            # descriptions (parallel crawling) overlap instead of queueing
+            response = await asyncio.to_thread(
+                self._create_response, model="gpt-4o", input=messages
+            )
             return response
         except Exception as e:
             print(f"Error getting GPT-4o response: {e}")
             raise
 
+    def get_embedding(self, text: str) -> List[float]:
+        """Get an embedding for the text using the configured embedding model."""
+        with get_llm_semaphore(self.config.max_concurrent_llm):
+            response = self._client.embeddings.create(
+                model=self.config.embedding_model_name, input=text
+            )
+        return response.data[0].embedding
+
+    def summarize_text(self, text: str) -> str:
+        """Summarize text with the summary model, falling back to the vision model."""
+        response = self._create_response(
+            model=self.config.summary_model_name or self.config.vision_model_name,
+            instructions=(
+                "Summarize this conversation between a user and a fashion trends "
+                "assistant. Keep the queries asked, the reports generated and any "
+                "storage decisions (container and blob names). Be concise."
+            ),
+            input=text,
+        )
+        return response.output_text
+
     def create_response_with_tools(
         self,
         model: str,
@@ -61,15 +112,20 @@ class TrendsAIClient:
         input_messages: List[Dict[str, Any]],
         tools: List[Dict[str, Any]],
         parallel_tool_calls: bool = False,
+        prompt_cache_key: Optional[str] = None,
+        stream: bool = False,
     ) -> Any:
         """Create response with custom tools (for MCP and function calls)."""
+        extra_body = {"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
         try:
-            response = self._client.responses.create(
+            response = self._create_response(
                 model=model,
                 instructions=instructions,
                 input=input_messages,
                 tools=tools,
                 parallel_tool_calls=parallel_tool_calls,
+                extra_body=extra_body,
+                stream=stream,
             )
             return response
         except Exception as e:
@@ -77,7 +133,10 @@ class TrendsAIClient:
             raise
 
     def create_message(
-        self, text: str, screenshot_base64: Optional[str] = None
+        self,
+        text: str,
+        screenshot_base64: Optional[str] = None,
+        image_mime_type: str = "image/png",
     ) -> Dict[str, Any]:
         """Create a properly formatted message for the AI."""
         content = [{"type": "input_text", "text": text}]
@@ -86,8 +145,38 @@ class TrendsAIClient:
             content.append(
                 {
                     "type": "input_image",
-                    "image_url": f"data:image/png;base64,{screenshot_base64}",
+                    "image_url": f"data:{image_mime_type};base64,{screenshot_base64}",
                 }
             )
 
         return {"role": "user", "content": content}
+
+
+class _PermitHoldingStream:
+    """Wraps a response stream and releases its concurrency permit once done."""
+
+    def __init__(self, stream: Any, semaphore: threading.BoundedSemaphore):
+        self._stream = stream
+        self._semaphore = semaphore
+        self._released = False
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying stream and release the permit exactly once."""
+        try:
+            self._stream.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._semaphore.release()
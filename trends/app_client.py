@@ -1,6 +1,8 @@
 """Application-specific client for trends compilation with MCP and function tools."""
 
+import hashlib
 from typing import List, Dict, Any, Optional
+import orjson
 from .ai_client import TrendsAIClient
 from .config import TrendsConfig
 
@@ -13,6 +15,20 @@ class TrendsAppClient(TrendsAIClient):
             config = TrendsConfig.from_env()
             config.validate()
         super().__init__(config)
+        # mcp_list_tools output from the first turn, replayed on later turns
+        self._mcp_tool_schema: Optional[Dict[str, Any]] = None
+
+    def remember_mcp_tools(self, mcp_list_tools_item: Any) -> None:
+        """
+        Keep the MCP tool listing returned by the Responses API.
+
+        While an mcp_list_tools item is part of the input, the API does not
+        fetch the tool list from the MCP server again, so it is listed only once
+        per session.
+        """
+        if hasattr(mcp_list_tools_item, "model_dump"):
+            mcp_list_tools_item = mcp_list_tools_item.model_dump(exclude_none=True)
+        self._mcp_tool_schema = mcp_list_tools_item
 
     def create_app_tools(
         self, mcp_server_url: str, available_functions: Dict[str, Any]
@@ -48,6 +64,24 @@ class TrendsAppClient(TrendsAIClient):
                         },
                     }
                 )
+            elif func_name == "get_report":
+                tools.append(
+                    {
+                        "type": "function",
+                        "name": "get_report",
+                        "description": "get the full text of a report generated earlier in this session",
+                        "parameters": {
+                            "type": "object",
+                            "properties": {
+                                "index": {
+                                    "type": "integer",
+                                    "description": "Position of the report in generation order, starting at 0; -1 for the most recent",
+                                },
+                            },
+                            "required": [],
+                        },
+                    }
+                )
 
         return tools
 
@@ -57,14 +91,38 @@ class TrendsAppClient(TrendsAIClient):
         conversation_history: List[Dict[str, Any]],
         mcp_server_url: str,
         available_functions: Dict[str, Any],
+        stream: bool = False,
     ) -> Any:
-        """Create response using app-specific tools and configuration."""
+        """Create response using app-specific tools and configuration.
+
+        With stream=True the raw event stream is returned instead of the
+        completed response.
+        """
         tools = self.create_app_tools(mcp_server_url, available_functions)
 
+        # Replay the cached tool listing ahead of the conversation
+        input_messages = conversation_history
+        if self._mcp_tool_schema:
+            input_messages = [self._mcp_tool_schema] + conversation_history
+
         return self.create_response_with_tools(
             model=self.config.vision_model_name,
             instructions=instructions,
-            input_messages=conversation_history,
+            input_messages=input_messages,
             tools=tools,
             parallel_tool_calls=False,
+            prompt_cache_key=self._prompt_cache_key(instructions, tools),
+            stream=stream,
         )
+
+    @staticmethod
+    def _prompt_cache_key(instructions: str, tools: List[Dict[str, Any]]) -> str:
+        """
+        Derive a stable cache key from the static request prefix.
+
+        Azure OpenAI caches prompt prefixes automatically; routing every turn of
+        a session with the same instructions and tools to the same key keeps
+        the instructions, tool schema and earlier history cache-hot.
+        """
+        prefix = orjson.dumps([instructions, tools], option=orjson.OPT_SORT_KEYS)
+        return "trends-" + hashlib.sha256(prefix).hexdigest()[:16]
@@ -1,16 +1,60 @@
 """Factory for creating Azure OpenAI clients with shared configuration."""
 
-from typing import Optional
-from openai import AzureOpenAI
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+import threading
+from functools import lru_cache
+from typing import Optional, TYPE_CHECKING
 from .config import TrendsConfig
 
+if TYPE_CHECKING:
+    import httpx
+    from openai import AzureOpenAI
+
+# openai, httpx and azure.identity are imported where they are used; they are
+# slow to import and not needed until the first request is made
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+@lru_cache(maxsize=1)
+def get_token_provider():
+    """
+    Return a process-wide bearer token provider.
+
+    Probing the DefaultAzureCredential chain is expensive, so the credential
+    and its token provider are created once and reused by every client.
+    """
+    from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+
+    return get_bearer_token_provider(DefaultAzureCredential(), COGNITIVE_SERVICES_SCOPE)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> "httpx.Client":
+    """Return a shared HTTP client so TCP/TLS sessions are reused across turns."""
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        timeout=httpx.Timeout(600.0, connect=10.0),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_llm_semaphore(max_concurrent: int) -> threading.BoundedSemaphore:
+    """
+    Return a process-wide semaphore capping in-flight model requests.
+
+    Requests are made from worker threads, so a threading semaphore is used
+    rather than an asyncio one; it must never be acquired on the event loop.
+    """
+    return threading.BoundedSemaphore(max_concurrent)
+
 
 class AzureOpenAIClientFactory:
     """Factory for creating Azure OpenAI clients."""
 
     @staticmethod
-    def create_client(config: Optional[TrendsConfig] = None) -> AzureOpenAI:
+    def create_client(config: Optional[TrendsConfig] = None) -> "AzureOpenAI":
         """
         Create Azure OpenAI client with proper authentication.
 
@@ -20,16 +64,18 @@ class AzureOpenAIClientFactory:
         Returns:
             Configured AzureOpenAI client
         """
+        from openai import AzureOpenAI
+
         if config is None:
             config = TrendsConfig.from_env()
             config.validate()
 
-        token_provider = get_bearer_token_provider(
-            DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default"
-        )
-
         return AzureOpenAI(
             base_url=f"{config.azure_endpoint}/openai/v1/",
-            azure_ad_token_provider=token_provider,
+            azure_ad_token_provider=get_token_provider(),
             api_version="preview",
+            http_client=get_http_client(),
+            # The SDK retries 429s with exponential backoff and jitter,
+            # honouring the Retry-After header sent by Azure OpenAI
+            max_retries=config.max_llm_retries,
         )
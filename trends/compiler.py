@@ -1,80 +1,133 @@
 """Main trends compiler orchestrator."""
 
 import asyncio
-import base64
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 from datetime import datetime
 import os
-from common.local_playwright import LocalPlaywrightComputer
+from common.local_playwright import (
+    LocalPlaywrightComputer,
+    SCREENSHOT_MIME_TYPE,
+    SCREENSHOT_QUALITY,
+    UNCHANGED_SCREENSHOT,
+)
+from common.utils import check_blocklisted_url, downscale_image
 from .config import TrendsConfig
 from .ai_client import TrendsAIClient
 from .action_handler import ComputerActionHandler
 from .parsers import CoordinateParser, ResponseParser
+from .report_cache import ReportCache
+
+# Images sent for description only (never for CUA click coordinates) are
+# downscaled, which cuts upload size and vision tokens
+DESCRIPTION_IMAGE_MAX_SIZE = (896, 672)
 
 
 class TrendsCompiler:
     """Main orchestrator for trends compilation workflow."""
 
-    def __init__(self, config: TrendsConfig):
+    def __init__(
+        self, config: TrendsConfig, computer: Optional[LocalPlaywrightComputer] = None
+    ):
         self.config = config
+        # The browser is launched once and shared by every compile_trends call
+        self.computer = computer
+        self._computer_lock = asyncio.Lock()
         self.ai_client = TrendsAIClient(config)
         self.coordinate_parser = CoordinateParser()
-        self.response_parser = ResponseParser()  # Storage for collected image data
+        self.response_parser = ResponseParser()
+        self.report_cache = ReportCache(
+            ttl_seconds=config.report_cache_ttl_hours * 3600,
+            embed=self.ai_client.get_embedding if config.embedding_model_name else None,
+        )
+        # Storage for collected image data
         self.image_analyses = []
 
     async def compile_trends(self, user_query: str) -> str:
         """Main entry point for trends compilation."""
         print(f"Starting trends compilation for query: '{user_query}'")
+        cached_report = await self.report_cache.get(user_query)
+        if cached_report:
+            print("Returning previously compiled report for this query")
+            return cached_report
+
+        # The compiler is reused across queries; start each run with a clean slate
+        self.image_analyses = []
 
-        async with LocalPlaywrightComputer() as computer:
-            self.action_handler = ComputerActionHandler(computer)
-            # Initialize workflow state
-            state = {"trends_compiled": False}
-            image_center_coordinates = []
-            step = 0
-            markdown_report = ""
-
-            while not state["trends_compiled"]:
-                try:
-                    if step == 0:
-                        await self._launch_pinterest(computer)
+        computer = await self._get_computer()
+        self.action_handler = ComputerActionHandler(computer)
+        # Initialize workflow state
+        state = {"trends_compiled": False}
+        image_center_coordinates = []
+        step = 0
+        markdown_report = ""
+
+        while not state["trends_compiled"]:
+            try:
+                if step == 0:
+                    await self._launch_pinterest(computer)
+                    step += 1
+                elif step == 1:
+                    image_center_coordinates = (
+                        await self._search_and_get_coordinates(computer, user_query)
+                    )
+                    if image_center_coordinates:
                         step += 1
-                    elif step == 1:
-                        image_center_coordinates = (
-                            await self._search_and_get_coordinates(computer, user_query)
-                        )
-                        if image_center_coordinates:
-                            step += 1
-                        else:
-                            print("No coordinates found, ending compilation")
-                            state["trends_compiled"] = True
-                    elif step == 2:
-                        await self._process_image_results(
-                            computer, image_center_coordinates, user_query
-                        )
-                        # Generate consolidated markdown report
-                        markdown_report = await self._generate_markdown_report(
-                            user_query
-                        )
-                        print(f"Trends analysis report generated successfully")
-                        state["trends_compiled"] = True
                     else:
+                        print("No coordinates found, ending compilation")
                         state["trends_compiled"] = True
-
-                except Exception as e:
-                    print(f"Error in step {step}: {e}")
+                elif step == 2:
+                    await self._process_image_results(
+                        computer, image_center_coordinates, user_query
+                    )
+                    # Generate consolidated markdown report
+                    markdown_report = await self._generate_markdown_report(
+                        user_query
+                    )
+                    print(f"Trends analysis report generated successfully")
+                    state["trends_compiled"] = True
+                else:
                     state["trends_compiled"] = True
 
-            # Final confirmation
-            # await self._final_confirmation()
+            except Exception as e:
+                print(f"Error in step {step}: {e}")
+                state["trends_compiled"] = True
 
-            return markdown_report
+        # Final confirmation
+        # await self._final_confirmation()
+
+        if self.image_analyses:
+            await self.report_cache.put(user_query, markdown_report)
+
+        return markdown_report
+
+    async def _get_computer(self) -> LocalPlaywrightComputer:
+        """Return the shared browser, launching it on first use or if it has died."""
+        async with self._computer_lock:
+            if self.computer is None or not self.computer.is_ready():
+                if self.computer is not None:
+                    print("Browser is no longer available, relaunching...")
+                    await self.close()
+                self.computer = await LocalPlaywrightComputer().__aenter__()
+            return self.computer
+
+    async def warm_up(self) -> None:
+        """Launch the shared browser ahead of the first query."""
+        try:
+            await self._get_computer()
+        except Exception as e:
+            print(f"Browser warm-up failed: {e}")
+
+    async def close(self) -> None:
+        """Close the shared browser."""
+        if self.computer is not None:
+            await self.computer.__aexit__(None, None, None)
+            self.computer = None
 
     async def _launch_pinterest(self, computer) -> None:
         """Step 1: Launch Pinterest."""
         print("Step 1: Launching Pinterest...")
         await computer.goto(url=self.config.web_crawl_url)
-        screenshot_bytes = await computer.screenshot()
+        await computer.screenshot()
         print("Pinterest landing page launched. Screenshot captured.")
 
     async def _search_and_get_coordinates(
@@ -105,12 +158,12 @@ class TrendsCompiler:
 
     async def _click_search_box(self, computer) -> None:
         """Click on the search box using AI."""
-        screenshot_bytes = await computer.screenshot()
-        screenshot_base64 = base64.b64encode(screenshot_bytes).decode("utf-8")
+        screenshot_base64 = await computer.screenshot()
 
         message = self.ai_client.create_message(
             "Please click on the search box on this page so I can type a search query.",
             screenshot_base64,
+            image_mime_type=SCREENSHOT_MIME_TYPE,
         )
 
         response = await self.ai_client.get_response([message])
@@ -149,10 +202,19 @@ If no search results are visible, just respond with 'no'."""
         max_checks = 10
 
         for i in range(max_checks):
-            screenshot_bytes = await computer.screenshot()
-            screenshot_base64 = base64.b64encode(screenshot_bytes).decode("utf-8")
+            # Skip asking the model about a page identical to the one it just
+            # answered "no" for; the hash is then reset, so an unchanged page is
+            # still re-checked on the following attempt in case that answer was wrong
+            screenshot_base64 = await computer.screenshot(skip_unchanged=i > 0)
+            if screenshot_base64 == UNCHANGED_SCREENSHOT:
+                print(f"Check {i+1}/{max_checks}: Page unchanged. Waiting...")
+                computer.reset_screenshot_hash()
+                await asyncio.sleep(1)
+                continue
 
-            message = self.ai_client.create_message(search_prompt, screenshot_base64)
+            message = self.ai_client.create_message(
+                search_prompt, screenshot_base64, image_mime_type=SCREENSHOT_MIME_TYPE
+            )
             response = await self.ai_client.get_response([message])
 
             print("CUA Response for search results present check:", response.output)
@@ -167,6 +229,8 @@ If no search results are visible, just respond with 'no'."""
                         break
             if not full_response:
                 print("No text response found, continuing...")
+                # Nothing was learned from this screenshot, so ask again next time
+                computer.reset_screenshot_hash()
                 continue
 
             print(f"Full response: {full_response}")
@@ -213,6 +277,12 @@ If no search results are visible, just respond with 'no'."""
         print(f"Processing {num_images_to_process} images using stored coordinates")
 
         try:
+            if self.config.parallel_crawling and await self._process_images_in_parallel(
+                computer, image_center_coordinates[:num_images_to_process], user_query
+            ):
+                print("All image pages processed successfully!")
+                return
+
             for i in range(num_images_to_process):
                 await self._process_single_image(
                     computer, image_center_coordinates[i], i + 1, user_query
@@ -223,6 +293,63 @@ If no search results are visible, just respond with 'no'."""
         except Exception as e:
             print(f"Error during image processing: {e}")
 
+    async def _process_images_in_parallel(
+        self, computer, image_center_coordinates: List[Tuple[int, int]], user_query: str
+    ) -> bool:
+        """
+        Open the linked image pages concurrently, one browser context each.
+
+        Returns:
+            False if no links could be resolved, so the caller can fall back
+            to clicking through the results one at a time
+        """
+        urls = []
+        for x, y in image_center_coordinates:
+            url = await computer.resolve_link_at(x, y)
+            if not url:
+                continue
+            try:
+                check_blocklisted_url(url)
+            except ValueError as e:
+                print(f"Skipping image link: {e}")
+                continue
+            urls.append(url)
+
+        if not urls:
+            print("No image links resolved, falling back to sequential crawling")
+            return False
+
+        print(f"Opening {len(urls)} image pages in parallel")
+        descriptions = await asyncio.gather(
+            *[
+                self._describe_url(computer, url, i, user_query)
+                for i, url in enumerate(urls, 1)
+            ],
+            return_exceptions=True,
+        )
+        # One failed page must not discard the descriptions of the others
+        for i, description in enumerate(descriptions, 1):
+            if isinstance(description, Exception):
+                print(f"Error describing image {i} page: {description}")
+            elif description:
+                self.image_analyses.append(description)
+        return True
+
+    async def _describe_url(
+        self, computer, url: str, image_num: int, user_query: str
+    ) -> str:
+        """Capture the page at a URL in its own context and describe it."""
+        screenshot_base64 = await computer.screenshot_url(url)
+        if not screenshot_base64:
+            return ""
+
+        print(f"Screenshot captured for image {image_num} page")
+        description = await self._get_page_description(
+            screenshot_base64, image_num, user_query
+        )
+        print(f"Page {image_num} description: {description}")
+        return description
+
     async def _process_single_image(
         self, computer, coordinates: Tuple[int, int], image_num: int, user_query: str
     ) -> None:
@@ -238,8 +365,7 @@ If no search results are visible, just respond with 'no'."""
         await asyncio.sleep(3)
 
         # Take screenshot and get description
-        screenshot_bytes = await computer.screenshot()
-        screenshot_base64 = base64.b64encode(screenshot_bytes).decode("utf-8")
+        screenshot_base64 = await computer.screenshot()
         print(f"Screenshot captured for image {image_num} page")  # Get page description
         description = await self._get_page_description(
             screenshot_base64, image_num, user_query
@@ -256,6 +382,13 @@ If no search results are visible, just respond with 'no'."""
         self, screenshot_base64: str, image_num: int, user_query: str
     ) -> str:
         """Get AI description of the current page using GPT-4o."""
+        if not screenshot_base64:
+            print(f"No screenshot available for image {image_num}")
+            return "No description available"
+
+        screenshot_base64 = downscale_image(
+            screenshot_base64, DESCRIPTION_IMAGE_MAX_SIZE, quality=SCREENSHOT_QUALITY
+        )
         message = self.ai_client.create_message(
             f"Please provide a title for the fashion trend observed in this image, followed by a detailed description. "
             f"Start your response with 'Title: [trend name]' then describe the content of this page in a concise manner, "
@@ -263,6 +396,7 @@ If no search results are visible, just respond with 'no'."""
             f"The user is specifically looking for trends related to: '{user_query}'. "
             f"Please highlight any elements that are relevant to this search query.",
             screenshot_base64,
+            image_mime_type=SCREENSHOT_MIME_TYPE,
         )
 
         response = await self.ai_client.get_gpt4o_response([message])
@@ -331,7 +465,7 @@ Please write in an engaging, professional tone suitable for a fashion industry r
                     {"type": "input_text", "text": analysis_prompt},
                     {
                         "type": "input_image",
-                        "image_url": f"data:image/png;base64,{screenshot_base64}",
+                        "image_url": f"data:{SCREENSHOT_MIME_TYPE};base64,{screenshot_base64}",
                     },
                 ],
             }
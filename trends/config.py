@@ -22,6 +22,13 @@ class TrendsConfig:
     web_crawl_url: str
     mcp_server_url: Optional[str]
     max_pages_for_crawling: int
+    parallel_crawling: bool = False
+    embedding_model_name: Optional[str] = None
+    report_cache_ttl_hours: float = 6
+    summary_model_name: Optional[str] = None
+    history_token_limit: int = 8000
+    max_concurrent_llm: int = 8
+    max_llm_retries: int = 5
     display_width: int = 1024
     display_height: int = 768
 
@@ -36,6 +43,13 @@ class TrendsConfig:
             web_crawl_url=os.getenv("web_crawl_url", "https://in.pinterest.com/ideas"),
             mcp_server_url=os.getenv("MCP_SERVER_URL"),
             max_pages_for_crawling=int(os.getenv("max_pages_for_crawling", "5")),
+            parallel_crawling=os.getenv("parallel_crawling", "false").lower() == "true",
+            embedding_model_name=os.getenv("EMBEDDING_MODEL_NAME"),
+            report_cache_ttl_hours=float(os.getenv("report_cache_ttl_hours", "6")),
+            summary_model_name=os.getenv("SUMMARY_MODEL_NAME"),
+            history_token_limit=int(os.getenv("history_token_limit", "8000")),
+            max_concurrent_llm=int(os.getenv("MAX_CONCURRENT_LLM", "8")),
+            max_llm_retries=int(os.getenv("MAX_LLM_RETRIES", "5")),
         )
 
     def validate(self) -> None:
@@ -44,3 +58,8 @@ class TrendsConfig:
         missing = [field for field in required_fields if not getattr(self, field)]
         if missing:
             raise ValueError(f"Missing required configuration: {', '.join(missing)}")
+        if self.max_concurrent_llm < 1:
+            # A zero-permit semaphore would block every model call forever
+            raise ValueError(
+                f"MAX_CONCURRENT_LLM must be at least 1, got {self.max_concurrent_llm}"
+            )
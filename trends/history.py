@@ -0,0 +1,177 @@
+"""Conversation history maintenance for the interactive trends application."""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Tuple
+import orjson
+from .parsers import ResponseParser
+
+FUNCTION_OUTPUT_PLACEHOLDER = (
+    "[function output omitted from older turn; reports can be retrieved with get_report]"
+)
+SUMMARY_PREFIX = "[Summary of earlier turns]: "
+
+# Rough size of a token in serialized history, used instead of a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+class HistoryManager:
+    """Keeps the conversation history sent to the Responses API small."""
+
+    @staticmethod
+    def message_text(message: Dict[str, Any]) -> str:
+        """Return the text of the first content part of a history message."""
+        if isinstance(message.get("output"), str):
+            return message["output"]
+        content = message.get("content")
+        if isinstance(content, str):
+            return content
+        for part in content or []:
+            if isinstance(part, dict) and "text" in part:
+                return part["text"]
+        return ""
+
+    @staticmethod
+    def extract_output_text(output) -> str:
+        """
+        Extract only the text the model needs from a response output item.
+
+        Messages carry their text in content parts and MCP calls in `output`;
+        anything else yields an empty string rather than the SDK object repr.
+        """
+        text = ResponseParser.extract_text_content(output)
+        if not text:
+            text = getattr(output, "text", None) or getattr(output, "output", None)
+        return text if isinstance(text, str) else ""
+
+    @staticmethod
+    def compact(
+        conversation_history: List[Dict[str, Any]], keep_turns: int = 2
+    ) -> List[Dict[str, Any]]:
+        """
+        Replace function call outputs in older turns with a short placeholder.
+
+        The call/output pairing the API requires is kept. The last `keep_turns` user turns are left untouched so the tail of the
+        history (and its cached prefix) is identical between calls.
+
+        Args:
+            conversation_history: Messages in Responses API input format
+            keep_turns: Number of trailing user turns to keep verbatim
+
+        Returns:
+            The compacted history
+        """
+        user_indices = [
+            i for i, msg in enumerate(conversation_history) if msg.get("role") == "user"
+        ]
+        if len(user_indices) <= keep_turns:
+            return conversation_history
+        tail_start = user_indices[-keep_turns] if keep_turns else len(conversation_history)
+
+        # Reports stay available through get_report; only the call pairing
+        # needs to stay in history
+        compacted = [
+            {**message, "output": FUNCTION_OUTPUT_PLACEHOLDER}
+            if message.get("type") == "function_call_output"
+            else message
+            for message in conversation_history[:tail_start]
+        ]
+        return compacted + conversation_history[tail_start:]
+
+    @staticmethod
+    def estimate_tokens(conversation_history: List[Dict[str, Any]]) -> int:
+        """Approximate the number of tokens the history adds to a request."""
+        return len(orjson.dumps(conversation_history)) // CHARS_PER_TOKEN
+
+    @classmethod
+    def summarize_oldest(
+        cls,
+        conversation_history: List[Dict[str, Any]],
+        summarize: Callable[[str], str],
+        token_limit: int,
+        keep_turns: int = 2,
+    ) -> List[Dict[str, Any]]:
+        """
+        Replace the oldest half of an oversized history with a summary message.
+
+        The history is split on a user turn, and the last `keep_turns` user
+        turns are always kept verbatim and do not count towards the limit.
+
+        Args:
+            conversation_history: Messages in Responses API input format
+            summarize: Function turning a transcript into a short summary
+            token_limit: Estimated token count of the older turns above which
+                to summarize
+            keep_turns: Number of trailing user turns to keep verbatim
+
+        Returns:
+            The history, with older turns summarized if it was over the limit
+        """
+        user_indices = [
+            i for i, msg in enumerate(conversation_history) if msg.get("role") == "user"
+        ]
+        candidates = user_indices[1:-keep_turns] if keep_turns else user_indices[1:]
+        if not candidates:
+            return conversation_history
+
+        # Only the older turns can be summarized, so only they count towards
+        # the limit; otherwise large recent turns would trigger a new summary
+        # (and a new prompt prefix) on every turn
+        tail_start = user_indices[-keep_turns] if keep_turns else len(conversation_history)
+        if cls.estimate_tokens(conversation_history[:tail_start]) <= token_limit:
+            return conversation_history
+        # Split on the user turn closest to the middle of the history
+        half = len(conversation_history) // 2
+        split = min(candidates, key=lambda i: abs(i - half))
+
+        transcript = "\n".join(
+            f"{msg.get('role') or msg.get('type')}: {cls.message_text(msg)}"
+            for msg in conversation_history[:split]
+        )
+        try:
+            summary = summarize(transcript)
+        except Exception as e:
+            print(f"Error summarizing conversation history: {e}")
+            return conversation_history
+
+        print(f"Summarized {split} older messages of conversation history")
+        summary_message = {
+            "role": "system",
+            "content": [{"type": "input_text", "text": SUMMARY_PREFIX + summary}],
+        }
+        return [summary_message] + conversation_history[split:]
+
+    @staticmethod
+    def save_session(
+        path: Path,
+        conversation_history: List[Dict[str, Any]],
+        generated_reports: List[str],
+    ) -> None:
+        """Write the session to disk atomically so a crash never leaves it half-written."""
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_bytes(
+            orjson.dumps({"history": conversation_history, "reports": generated_reports})
+        )
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def load_session(
+        path: Path, max_age_seconds: float
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Load a previously saved session if it exists and is recent enough.
+
+        Returns:
+            The conversation history and generated reports, empty if none loaded
+        """
+        try:
+            if time.time() - path.stat().st_mtime > max_age_seconds:
+                return [], []
+            session = orjson.loads(path.read_bytes())
+            return session["history"], session["reports"]
+        except FileNotFoundError:
+            return [], []
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring unreadable session file {path}: {e}")
+            return [], []
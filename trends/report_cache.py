@@ -0,0 +1,121 @@
+"""In-session cache of compiled trends reports keyed by user query."""
+
+import asyncio
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Function words only; content words such as "latest" or "trends" may be
+# all that distinguishes two queries
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "me", "my",
+}
+
+
+@dataclass
+class CachedReport:
+    """A compiled report and the data needed to match it against new queries."""
+
+    report: str
+    embedding: Optional[List[float]]
+    created_at: float
+
+
+class ReportCache:
+    """
+    Exact and semantic cache of markdown reports.
+
+    Queries are first matched on a normalized form (lowercase, punctuation and
+    stopwords removed). If an embedding function is provided, near-identical
+    queries are matched by cosine similarity of their embeddings.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        embed: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = 0.92,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self._entries: Dict[str, CachedReport] = {}
+        # Embedding of the most recent missed lookup, reused if it gets stored
+        self._last_lookup: Optional[Tuple[str, List[float]]] = None
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Reduce a query to its significant words."""
+        words = re.findall(r"[a-z0-9']+", query.lower())
+        return " ".join(word for word in words if word not in STOPWORDS)
+
+    async def get(self, query: str) -> Optional[str]:
+        """Return a cached report for the query, or None on a miss."""
+        self._evict_expired()
+        key = self.normalize(query)
+        if not key:
+            return None
+
+        entry = self._entries.get(key)
+        if entry:
+            print("Report cache hit (exact match)")
+            return entry.report
+
+        embedding = await self._get_embedding(key)
+        if embedding is None:
+            return None
+        self._last_lookup = (key, embedding)
+
+        best_entry, best_score = None, 0.0
+        for entry in self._entries.values():
+            if entry.embedding is None:
+                continue
+            score = self._cosine_similarity(embedding, entry.embedding)
+            if score > best_score:
+                best_entry, best_score = entry, score
+
+        if best_entry and best_score >= self.similarity_threshold:
+            print(f"Report cache hit (similarity {best_score:.2f})")
+            return best_entry.report
+        return None
+
+    async def put(self, query: str, report: str) -> None:
+        """Store a report for the query."""
+        key = self.normalize(query)
+        if not key:
+            return
+
+        if self._last_lookup and self._last_lookup[0] == key:
+            embedding = self._last_lookup[1]
+        else:
+            embedding = await self._get_embedding(key)
+        self._last_lookup = None
+
+        self._entries[key] = CachedReport(
+            report=report, embedding=embedding, created_at=time.monotonic()
+        )
+
+    async def _get_embedding(self, key: str) -> Optional[List[float]]:
+        """Embed a normalized query, or return None if embeddings are disabled."""
+        if self.embed is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.embed, key)
+        except Exception as e:
+            print(f"Error embedding query for report cache: {e}")
+            return None
+
+    def _evict_expired(self) -> None:
+        """Drop reports older than the TTL."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        for key in [k for k, e in self._entries.items() if e.created_at < cutoff]:
+            del self._entries[key]
+
+    @staticmethod
+    def _cosine_similarity(a: List[float], b: List[float]) -> float:
+        """Cosine similarity of two vectors."""
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0